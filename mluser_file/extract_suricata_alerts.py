@@ -1,8 +1,14 @@
 # mluser_file/extract_suricata_alerts.py
 
 import os
+import io
+import glob
+import gzip
+import lzma
+import zlib
 import json
 import shutil
+import tempfile
 import datetime
 import pandas as pd
 
@@ -10,26 +16,141 @@ import pandas as pd
 DEFAULT_LOG_PATH    = '/var/log/suricata/eve.json'
 CSV_OUTPUT_PATH     = os.path.join(os.path.dirname(__file__), 'suricata_alerts.csv')
 BACKUP_DIR          = os.path.join(os.path.dirname(__file__), 'backups')
+SEGMENT_INDEX_PATH  = os.path.join(os.path.dirname(__file__), 'segment_index.json')
+SEGMENT_PATTERN     = 'eve.json*'   # 디렉토리를 넘겼을 때 찾을 로그 파일 이름 (logrotate 결과 포함)
+ALERT_COLUMNS       = ['timestamp', 'src_ip', 'src_port', 'dest_ip', 'dest_port', 'proto',
+                       'alert_signature', 'severity', 'flow_pkts_toserver', 'flow_pkts_toclient']
 
 # 백업 디렉토리 생성
 os.makedirs(BACKUP_DIR, exist_ok=True)
 
-def extract_alerts(log_path: str = DEFAULT_LOG_PATH) -> pd.DataFrame:
+def _parse_ts(value):
     """
-    1) JSON-lines 로그에서 event_type=='alert' 만 필터링
-    2) 주요 필드(timestamp, src/dst IP·Port, proto, signature, severity, flow pkts) 추출
-    3) 기존 CSV는 backups/alerts_YYYYMMDD_HHMMSS.csv 로 이동해 백업
-    4) 새 DataFrame을 suricata_alerts.csv 로 저장 및 반환
+    Suricata timestamp(또는 datetime) → epoch 초(float), 해석 불가면 None
+    - '2025-04-14T11:54:31.547436+0900', '+09:00' 형식 모두 지원
+    - 타임존이 없으면 로컬 시간으로 간주
     """
-    # 1. 기존 CSV 백업
-    if os.path.exists(CSV_OUTPUT_PATH):
-        ts = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
-        backup_name = f'alerts_{ts}.csv'
-        shutil.move(CSV_OUTPUT_PATH, os.path.join(BACKUP_DIR, backup_name))
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime.datetime):
+        return value.timestamp()
+    try:
+        return datetime.datetime.strptime(value, '%Y-%m-%dT%H:%M:%S.%f%z').timestamp()
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+class _ZstdRawReader(io.RawIOBase):
+    """
+    zstandard 스트림 래퍼 - 손상된 .zst 의 ZstdError 를 OSError 로 바꿔
+    다른 압축 형식과 같은 방식으로 건너뛸 수 있게 함
+    """
+    def __init__(self, reader, error_type):
+        self._reader = reader
+        self._error_type = error_type
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        try:
+            return self._reader.readinto(b)
+        except self._error_type as e:
+            raise OSError(f"zstd 압축 해제 실패: {e}") from e
+
+    def close(self):
+        if not self.closed:
+            self._reader.close()
+        super().close()
 
+def _open_segment(path: str):
+    """
+    확장자에 따라 압축을 스트리밍으로 풀어 텍스트 파일 객체 반환 (임시 파일 없음)
+    - .gz → gzip, .xz → lzma, .zst → zstandard(선택 설치), 그 외 → 일반 텍스트
+    """
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', errors='replace')
+    if path.endswith('.xz'):
+        return lzma.open(path, 'rt', errors='replace')
+    if path.endswith('.zst'):
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError(f".zst 로그를 읽으려면 zstandard 패키지가 필요합니다: {path}")
+        # pzstd / zstd -T 로 만든 다중 프레임 파일도 끝까지 읽음
+        raw = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True,
+                                                         read_across_frames=True)
+        raw = _ZstdRawReader(raw, zstandard.ZstdError)
+        return io.TextIOWrapper(io.BufferedReader(raw), errors='replace')
+    return open(path, 'r', errors='replace')
+
+def _rotation_number(path: str) -> int:
+    """
+    eve.json.2.gz → 2, eve.json → 0 (숫자가 클수록 오래된 로그)
+    """
+    for part in reversed(os.path.basename(path).split('.')):
+        if part.isdigit():
+            return int(part)
+    return 0
+
+def list_segments(log_path: str) -> list:
+    """
+    단일 파일 / 디렉토리 / glob 패턴을 받아 로그 세그먼트 목록을 오래된 순으로 반환
+    - 디렉토리면 그 안의 eve.json* 을 사용
+    - 정렬: 수정 시각 오름차순, 같으면 회전 번호가 큰(오래된) 것 먼저
+    """
+    if os.path.isdir(log_path):
+        paths = glob.glob(os.path.join(log_path, SEGMENT_PATTERN))
+    elif glob.has_magic(log_path):
+        paths = glob.glob(log_path)
+    else:
+        if not os.path.exists(log_path):
+            raise FileNotFoundError(f"로그 파일이 없습니다: {log_path}")
+        return [log_path]
+
+    paths = [p for p in paths if os.path.isfile(p)]
+    if not paths:
+        raise FileNotFoundError(f"로그 파일이 없습니다: {log_path}")
+    return sorted(paths, key=lambda p: (os.path.getmtime(p), -_rotation_number(p)))
+
+def _load_segment_index() -> dict:
+    if not os.path.exists(SEGMENT_INDEX_PATH):
+        return {}
+    try:
+        with open(SEGMENT_INDEX_PATH, 'r') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+def _save_segment_index(index: dict):
+    """
+    요청마다 고유한 임시 파일에 쓴 뒤 교체 (Flask 스레드끼리 임시 파일이 겹치지 않음)
+    인덱스는 캐시일 뿐이므로 저장 실패는 경고만 하고 넘어감
+    """
+    tmp_path = None
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(SEGMENT_INDEX_PATH),
+                                        prefix='segment_index.', suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp_path, SEGMENT_INDEX_PATH)
+    except OSError as e:
+        print(f"⚠️ 세그먼트 인덱스 저장 실패: {e}")
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def _parse_segment(seg_path: str, start_ts, end_ts):
+    """
+    세그먼트 하나에서 알림 레코드를 뽑아 (records, 알림 최소 ts, 알림 최대 ts) 반환
+    timestamp 는 alert 이벤트에서만 해석 (flow/dns 등 대부분의 줄은 json 파싱만 함)
+    """
+    has_range = start_ts is not None or end_ts is not None
     records = []
-    # 2. 로그 파일 파싱
-    with open(log_path, 'r') as f:
+    seg_min = seg_max = None
+    with _open_segment(seg_path) as f:
         for line in f:
             try:
                 evt = json.loads(line)
@@ -38,6 +159,18 @@ def extract_alerts(log_path: str = DEFAULT_LOG_PATH) -> pd.DataFrame:
             if evt.get('event_type') != 'alert':
                 continue
 
+            evt_ts = _parse_ts(evt.get('timestamp'))
+            if evt_ts is not None:
+                seg_min = evt_ts if seg_min is None else min(seg_min, evt_ts)
+                seg_max = evt_ts if seg_max is None else max(seg_max, evt_ts)
+            if has_range:
+                if evt_ts is None:
+                    continue
+                if start_ts is not None and evt_ts < start_ts:
+                    continue
+                if end_ts is not None and evt_ts > end_ts:
+                    continue
+
             # 필드 추출
             alert = evt.get('alert', {})
             flow  = evt.get('flow', {})
@@ -54,24 +187,105 @@ def extract_alerts(log_path: str = DEFAULT_LOG_PATH) -> pd.DataFrame:
                 'flow_pkts_toclient'  : flow.get('pkts_toclient', 0),
             }
             records.append(rec)
+    return records, seg_min, seg_max
+
+def extract_alerts(log_path: str = DEFAULT_LOG_PATH, start=None, end=None,
+                   save_csv: bool = True) -> pd.DataFrame:
+    """
+    1) JSON-lines 로그에서 event_type=='alert' 만 필터링
+    2) 주요 필드(timestamp, src/dst IP·Port, proto, signature, severity, flow pkts) 추출
+    3) 기존 CSV는 backups/alerts_YYYYMMDD_HHMMSS.csv 로 이동해 백업
+    4) 새 DataFrame을 suricata_alerts.csv 로 저장 및 반환
+
+    log_path 는 단일 파일, 디렉토리, glob 패턴(eve.json*) 모두 가능하며
+    .gz/.xz/.zst 세그먼트는 압축을 풀지 않고 스트리밍으로 읽음.
+    start/end(ISO 문자열 또는 datetime)를 주면 그 구간의 알림만 남기고,
+    세그먼트별 알림 최소/최대 timestamp 인덱스로 구간 밖 세그먼트는 열지 않음.
+    읽을 수 없는 세그먼트(압축 중인 .gz, 손상된 파일, zstandard 미설치 등)는 경고 후 건너뜀.
+    save_csv=False 이면 3)·4)의 CSV 백업/저장 없이 DataFrame 만 반환
+    (구간 조회 결과가 학습용 suricata_alerts.csv 를 덮어쓰지 않도록).
+    """
+    start_ts = _parse_ts(start)
+    end_ts   = _parse_ts(end)
+    if start is not None and start_ts is None:
+        raise ValueError(f"start 시간을 해석할 수 없습니다: {start}")
+    if end is not None and end_ts is None:
+        raise ValueError(f"end 시간을 해석할 수 없습니다: {end}")
+    segments = list_segments(log_path)
+
+    index = _load_segment_index()
+    index_changed = False
+    records = []
+    # 1. 세그먼트별 로그 파싱 (오래된 것부터)
+    for seg_path in segments:
+        key  = os.path.abspath(seg_path)
+        stat = os.stat(seg_path)
+        entry = index.get(key)
+        # 인덱스가 최신이면 알림이 없거나 구간 밖인 세그먼트는 통째로 건너뜀
+        if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+            if entry['min_ts'] is None:
+                continue
+            if start_ts is not None and entry['max_ts'] < start_ts:
+                continue
+            if end_ts is not None and entry['min_ts'] > end_ts:
+                continue
+
+        try:
+            seg_records, seg_min, seg_max = _parse_segment(seg_path, start_ts, end_ts)
+        except (EOFError, OSError, zlib.error, lzma.LZMAError, ImportError) as e:
+            print(f"⚠️ 세그먼트를 읽을 수 없어 건너뜁니다: {seg_path} ({e})")
+            continue
+        records.extend(seg_records)
+
+        index[key] = {
+            'size'  : stat.st_size,
+            'mtime' : stat.st_mtime,
+            'min_ts': seg_min,
+            'max_ts': seg_max,
+        }
+        index_changed = True
+
+    # 삭제된(logrotate 로 지워진) 세그먼트 항목 정리
+    for key in [k for k in index if not os.path.exists(k)]:
+        del index[key]
+        index_changed = True
+    if index_changed:
+        _save_segment_index(index)
 
-    # 3. DataFrame 생성 및 CSV 저장
-    df = pd.DataFrame(records)
+    # 2. DataFrame 생성 (알림이 없어도 컬럼은 유지)
+    df = pd.DataFrame(records, columns=ALERT_COLUMNS)
+    if not save_csv:
+        return df
+
+    # 3. 파싱이 끝난 뒤에 기존 CSV 백업 후 저장
+    if os.path.exists(CSV_OUTPUT_PATH):
+        ts = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+        backup_name = f'alerts_{ts}.csv'
+        shutil.move(CSV_OUTPUT_PATH, os.path.join(BACKUP_DIR, backup_name))
     df.to_csv(CSV_OUTPUT_PATH, index=False)
     return df
 
-def featurize(df: pd.DataFrame) -> pd.DataFrame:
+def featurize(df: pd.DataFrame, sig_vocab: dict = None) -> pd.DataFrame:
     """
     ML 입력용 피처 생성
     - timestamp → hour (0–23)
     - alert_signature → sig_code (factorize)
     - severity, flow_pkts_toserver, flow_pkts_toclient 그대로
+
+    sig_vocab(시그니처→코드 dict)를 넘기면 기존 코드를 유지한 채
+    새 시그니처만 뒤에 추가하므로, 나눠서 피처를 만들어도 sig_code가 일관됨
     """
     df = df.copy()
     # 시간(hour) 추출
     df['hour'] = pd.to_datetime(df['timestamp'], errors='coerce').dt.hour.fillna(0).astype(int)
     # 시그니처를 숫자 인덱스로 변환
-    df['sig_code'] = pd.factorize(df['alert_signature'])[0]
+    if sig_vocab is None:
+        df['sig_code'] = pd.factorize(df['alert_signature'])[0]
+    else:
+        for sig in df['alert_signature'].dropna().unique():
+            if sig not in sig_vocab:
+                sig_vocab[sig] = len(sig_vocab)
+        df['sig_code'] = df['alert_signature'].map(sig_vocab).fillna(-1).astype(int)
 
     # 사용할 피처 리스트
     feature_cols = ['hour', 'severity', 'flow_pkts_toserver', 'flow_pkts_toclient', 'sig_code']
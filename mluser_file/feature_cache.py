@@ -0,0 +1,225 @@
+# mluser_file/feature_cache.py
+
+import os
+import io
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+
+from mluser_file.extract_suricata_alerts import featurize
+
+# 캐시 경로 설정
+BASE_DIR        = os.path.dirname(__file__)
+CACHE_DIR       = os.path.join(BASE_DIR, 'feature_cache')
+FEATURES_FILE   = 'features.f32'    # (행, 피처) float32 행렬을 그대로 이어 붙인 파일
+LABELS_FILE     = 'labels.i8'       # 행마다 int8 레이블
+MANIFEST_FILE   = 'manifest.json'   # 컬럼, 행 수, 소스별 오프셋, 행 범위
+FINGERPRINT_LEN = 4096              # CSV 교체 여부 판별에 쓰는 앞부분/오프셋 직전 바이트 수
+
+FEATURE_DTYPE = np.float32
+LABEL_DTYPE   = np.int8
+
+
+def _empty_manifest() -> dict:
+    return {
+        'feature_cols': None,
+        'n_rows'      : 0,
+        'sig_vocab'   : {},
+        'sources'     : {},   # csv 경로 → {generation, offset, fingerprint}
+        'segments'    : [],   # 추가된 구간별 {source, generation, row_start, row_end, offset_start, offset_end}
+    }
+
+
+def _fingerprint(csv_path: str, offset: int) -> str:
+    """
+    CSV 앞부분과 offset 직전(다음 추가 지점) 바이트의 해시
+    extract_alerts 가 파일을 새로 쓰면 앞부분이 같아도 추가 지점 근처가 달라져 값이 바뀜
+    """
+    length = min(offset, FINGERPRINT_LEN)
+    with open(csv_path, 'rb') as f:
+        h = hashlib.sha1(f.read(length))
+        f.seek(offset - length)
+        h.update(f.read(length))
+    return h.hexdigest()
+
+
+def load_manifest(cache_dir: str = CACHE_DIR) -> dict:
+    path = os.path.join(cache_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return _empty_manifest()
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _save_manifest(manifest: dict, cache_dir: str):
+    # 임시 파일에 쓴 뒤 교체 → 중간에 죽어도 manifest 가 깨지지 않음
+    path = os.path.join(cache_dir, MANIFEST_FILE)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _trim_to_manifest(manifest: dict, cache_dir: str) -> bool:
+    """
+    manifest 저장 전에 죽어서 남은 고아 행을 잘라냄
+    파일이 manifest 보다 짧으면(손상) False 반환
+    """
+    n_rows = manifest['n_rows']
+    n_cols = len(manifest['feature_cols'] or [])
+    expected = {
+        FEATURES_FILE: n_rows * n_cols * np.dtype(FEATURE_DTYPE).itemsize,
+        LABELS_FILE  : n_rows * np.dtype(LABEL_DTYPE).itemsize,
+    }
+    for name, nbytes in expected.items():
+        path = os.path.join(cache_dir, name)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if size < nbytes:
+            return False
+        if size > nbytes:
+            os.truncate(path, nbytes)
+    return True
+
+
+def reset_cache(cache_dir: str = CACHE_DIR):
+    """
+    캐시 파일 전체 삭제
+    """
+    for name in (FEATURES_FILE, LABELS_FILE, MANIFEST_FILE):
+        path = os.path.join(cache_dir, name)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _read_new_rows(csv_path: str, offset: int):
+    """
+    CSV 에서 offset 이후 완결된 줄만 읽어 (DataFrame, 새 offset) 반환
+    헤더는 항상 첫 줄에서 가져옴
+    """
+    with open(csv_path, 'rb') as f:
+        header = f.readline()
+        if offset < len(header):
+            offset = len(header)
+        f.seek(offset)
+        data = f.read()
+
+    # 기록 중인 마지막 줄(개행 없음)은 다음 실행에서 읽음
+    end = data.rfind(b'\n') + 1
+    data = data[:end]
+    if not data.strip():
+        return None, offset
+    df = pd.read_csv(io.BytesIO(header + data))
+    return df, offset + end
+
+
+def update_cache(csv_path: str, cache_dir: str = CACHE_DIR) -> dict:
+    """
+    csv_path 에서 마지막 실행 이후 추가된 행만 featurize 해서 캐시에 이어 붙임
+    - CSV 가 교체(백업 후 재생성)되었으면 기존 행은 그대로 두고
+      새 세대(generation)로 보고 처음부터 다시 읽어 뒤에 이어 붙임
+    - 갱신된 manifest 반환
+    """
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(f"CSV 파일이 없습니다: {csv_path}")
+    os.makedirs(cache_dir, exist_ok=True)
+
+    manifest = load_manifest(cache_dir)
+    source_key = os.path.abspath(csv_path)
+    source = manifest['sources'].get(source_key)
+
+    # 이전에 읽은 부분이 그대로인지 확인, 달라졌으면 새 세대로 처음부터 읽음
+    generation = source.get('generation', 0) if source else 0
+    offset = source['offset'] if source else 0
+    if source is not None:
+        size = os.path.getsize(csv_path)
+        if size < offset or _fingerprint(csv_path, offset) != source['fingerprint']:
+            generation += 1
+            offset = 0
+            print(f"CSV 가 변경되어 새 세대({generation})로 추가합니다: {csv_path}")
+
+    # 이전 실행이 중간에 죽었으면 manifest 기준으로 파일 길이를 맞춤
+    if not _trim_to_manifest(manifest, cache_dir):
+        print("피처 캐시 파일이 manifest 와 맞지 않아 다시 만듭니다.")
+        reset_cache(cache_dir)
+        manifest = _empty_manifest()
+        generation, offset = 0, 0
+
+    df, new_offset = _read_new_rows(csv_path, offset)
+    if df is None:
+        return manifest
+
+    if 'label' not in df.columns:
+        raise KeyError("CSV에 'label' 컬럼이 없습니다. 0=정상, 1=이상 레이블이 필요합니다.")
+    # int8 로 그대로 캐스팅되면 NaN 등이 쓰레기 값으로 영구 저장되므로 미리 거부
+    if df['label'].isna().any() or not df['label'].isin([0, 1]).all():
+        raise ValueError("'label' 컬럼에 비어 있거나 0/1 이 아닌 값이 있습니다.")
+
+    X = featurize(df, sig_vocab=manifest['sig_vocab'])
+    if manifest['feature_cols'] is None:
+        manifest['feature_cols'] = list(X.columns)
+    elif list(X.columns) != manifest['feature_cols']:
+        raise ValueError("피처 컬럼 구성이 캐시와 다릅니다. reset_cache() 후 다시 실행하세요.")
+
+    # 행렬은 append 모드로 뒤에 이어 쓰기만 함 (기존 행은 다시 쓰지 않음)
+    with open(os.path.join(cache_dir, FEATURES_FILE), 'ab') as f:
+        f.write(np.ascontiguousarray(X.to_numpy(dtype=FEATURE_DTYPE)).tobytes())
+    with open(os.path.join(cache_dir, LABELS_FILE), 'ab') as f:
+        f.write(df['label'].to_numpy(dtype=LABEL_DTYPE).tobytes())
+
+    row_start = manifest['n_rows']
+    manifest['n_rows'] = row_start + len(X)
+    manifest['segments'].append({
+        'source'      : source_key,
+        'generation'  : generation,
+        'row_start'   : row_start,
+        'row_end'     : manifest['n_rows'],
+        'offset_start': offset,
+        'offset_end'  : new_offset,
+    })
+    manifest['sources'][source_key] = {
+        'generation' : generation,
+        'offset'     : new_offset,
+        'fingerprint': _fingerprint(csv_path, new_offset),
+    }
+    _save_manifest(manifest, cache_dir)
+    print(f"피처 캐시 추가: {len(X)}행 (누적 {manifest['n_rows']}행)")
+    return manifest
+
+
+def load_features(cache_dir: str = CACHE_DIR):
+    """
+    캐시를 np.memmap 으로 열어 (X, y, feature_cols) 반환
+    메모리에 복사하지 않으므로 RAM 보다 큰 데이터도 다룰 수 있음
+    """
+    manifest = load_manifest(cache_dir)
+    n_rows = manifest['n_rows']
+    if n_rows == 0:
+        raise ValueError("피처 캐시가 비어 있습니다. update_cache() 를 먼저 실행하세요.")
+    cols = manifest['feature_cols']
+
+    X = np.memmap(os.path.join(cache_dir, FEATURES_FILE), dtype=FEATURE_DTYPE,
+                  mode='r', shape=(n_rows, len(cols)))
+    y = np.memmap(os.path.join(cache_dir, LABELS_FILE), dtype=LABEL_DTYPE,
+                  mode='r', shape=(n_rows,))
+    return X, y, cols
+
+
+def balanced_indices(y, max_per_class: int = None, random_state: int = None) -> np.ndarray:
+    """
+    클래스별로 최대 max_per_class 개씩 행 인덱스를 뽑아 정렬해서 반환
+    - max_per_class=None 이면 가장 적은 클래스 개수에 맞춤 (클래스 균형)
+    - 정렬된 인덱스라 memmap 에서 순차적으로 읽힘
+    """
+    rng = np.random.default_rng(random_state)
+    classes, counts = np.unique(y, return_counts=True)
+    if max_per_class is None:
+        max_per_class = int(counts.min())
+
+    picked = []
+    for cls in classes:
+        idx = np.flatnonzero(y == cls)
+        if len(idx) > max_per_class:
+            idx = rng.choice(idx, size=max_per_class, replace=False)
+        picked.append(idx)
+    return np.sort(np.concatenate(picked))
@@ -7,8 +7,8 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 import joblib
 
-# 같은 폴더의 extract_suricata_alerts 모듈에서 featurize 가져오기
-from mluser_file.extract_suricata_alerts import featurize
+# 같은 폴더의 feature_cache 모듈에서 캐시 함수 가져오기
+from mluser_file.feature_cache import update_cache, load_features, balanced_indices
 
 # 경로 설정
 BASE_DIR       = os.path.dirname(__file__)
@@ -17,26 +17,22 @@ MODEL_OUTPUT   = os.path.join(BASE_DIR, 'rf_model.joblib')
 TEST_SIZE      = 0.2           # 테스트 데이터 비율
 RANDOM_STATE   = 42            # 재현성을 위한 시드
 N_ESTIMATORS   = 100           # RandomForest 트리 개수
-
-def load_data(csv_path: str) -> pd.DataFrame:
-    """
-    CSV에서 DataFrame 로드, 'label' 컬럼 확인
-    """
-    if not os.path.exists(csv_path):
-        raise FileNotFoundError(f"CSV 파일이 없습니다: {csv_path}")
-    df = pd.read_csv(csv_path)
-    if 'label' not in df.columns:
-        raise KeyError("CSV에 'label' 컬럼이 없습니다. 0=정상, 1=이상 레이블이 필요합니다.")
-    return df
+SAMPLE_PER_CLASS = None        # None=전체 행 사용, 정수=클래스별 최대 행 수 (RAM보다 큰 캐시용)
 
 def train_model():
-    # 1) 데이터 불러오기
-    df = load_data(CSV_PATH)
-    print(f"총 샘플: {len(df)}, 이상 이벤트: {df['label'].sum()}, 정상 이벤트: {len(df)-df['label'].sum()}")
+    # 1) 새로 추가된 행만 피처 캐시에 반영
+    update_cache(CSV_PATH)
 
-    # 2) 피처 생성
-    X = featurize(df)
-    y = df['label']
+    # 2) 캐시된 피처를 memmap 으로 로드 (필요하면 클래스별 샘플링)
+    X, y, feature_cols = load_features()
+    n_anomaly = int(y.sum())
+    print(f"총 샘플: {len(y)}, 이상 이벤트: {n_anomaly}, 정상 이벤트: {len(y)-n_anomaly}")
+    if SAMPLE_PER_CLASS is not None:
+        idx = balanced_indices(y, SAMPLE_PER_CLASS, RANDOM_STATE)
+        X, y = X[idx], y[idx]
+        print(f"클래스별 최대 {SAMPLE_PER_CLASS}개 샘플링: {len(y)}행")
+    X = pd.DataFrame(X, columns=feature_cols)
+    y = pd.Series(y, name='label')
     print("피처(shape):", X.shape)
 
     # 3) Train/Test 분할
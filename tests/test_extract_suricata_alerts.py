@@ -0,0 +1,48 @@
+import gzip
+import json
+
+import pytest
+
+from mluser_file import extract_suricata_alerts as esa
+
+
+def _alert(day, sig):
+    return json.dumps({
+        'timestamp' : f'2025-04-{day:02d}T10:00:00.000000+0900',
+        'event_type': 'alert',
+        'alert'     : {'signature': sig, 'severity': 2},
+        'flow'      : {},
+    }) + '\n'
+
+
+@pytest.fixture
+def log_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(esa, 'CSV_OUTPUT_PATH', str(tmp_path / 'alerts.csv'))
+    monkeypatch.setattr(esa, 'SEGMENT_INDEX_PATH', str(tmp_path / 'segment_index.json'))
+    monkeypatch.setattr(esa, 'BACKUP_DIR', str(tmp_path))
+    logs = tmp_path / 'logs'
+    logs.mkdir()
+    return logs
+
+
+def test_corrupt_segments_are_skipped(log_dir):
+    # gzip 헤더는 정상이고 본문만 손상 → zlib.error
+    data = bytearray(gzip.compress((_alert(1, 'gz') * 200).encode()))
+    data[20:40] = b'\xff' * 20
+    (log_dir / 'eve.json.3.gz').write_bytes(bytes(data))
+    # zstd 매직 넘버 뒤 쓰레기 값 → ZstdError (zstandard 미설치면 ImportError)
+    (log_dir / 'eve.json.2.zst').write_bytes(b'\x28\xb5\x2f\xfd' + b'\x00garbage' * 10)
+    (log_dir / 'eve.json').write_text(_alert(4, 'live'))
+
+    df = esa.extract_alerts(str(log_dir))
+
+    assert df['alert_signature'].tolist() == ['live']
+
+
+def test_empty_range_keeps_columns(log_dir):
+    (log_dir / 'eve.json').write_text(_alert(4, 'live'))
+
+    df = esa.extract_alerts(str(log_dir), start='2026-01-01T00:00', save_csv=False)
+
+    assert df.empty
+    assert list(df.columns) == esa.ALERT_COLUMNS
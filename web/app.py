@@ -5,6 +5,7 @@ import pandas as pd
 from flask import Flask, render_template, request, redirect, url_for, session, jsonify
 from werkzeug.utils import secure_filename
 from mluser_file.extract_suricata_alerts import extract_alerts, featurize
+from mluser_file.feature_cache import load_manifest
 from tplink import inspect_router as inspect_tplink  # 공유기 점검 함수
 
 app = Flask(__name__)
@@ -19,6 +20,7 @@ os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
 MODEL_PATH = os.path.join(BASE_DIR, 'mluser_file', 'rf_model.joblib')
 DEFAULT_LOG_PATH = '/var/log/suricata/eve.json'
+LOG_HISTORY_DIR = '/var/log/suricata'  # eve.json + logrotate 세그먼트(eve.json.1, eve.json.2.gz ...)
 
 # 모델 로드
 try:
@@ -28,6 +30,13 @@ except Exception as e:
     print(f"❌ 모델 로드 실패: {e}")
     MODEL = None
 
+# 학습 때 쓴 시그니처→sig_code 매핑 (추론에서도 같은 코드를 쓰도록)
+try:
+    SIG_VOCAB = load_manifest().get('sig_vocab', {})
+except Exception as e:
+    print(f"❌ 시그니처 매핑 로드 실패: {e}")
+    SIG_VOCAB = {}
+
 def fetch_system_info():
     cpu = psutil.cpu_percent(percpu=True)
     mem = psutil.virtual_memory()
@@ -105,18 +114,30 @@ def detect():
     if not session.get('logged_in'):
         return redirect(url_for('login'))
 
+    # 선택 입력: 분석할 시간 구간 (비어 있으면 전체)
+    start = request.form.get('start') or None
+    end = request.form.get('end') or None
+
     file = request.files.get('log_file')
     if file:
         filename = secure_filename(file.filename)
         log_path = os.path.join(UPLOAD_FOLDER, filename)
         file.save(log_path)
+    elif start or end:
+        # 구간이 있을 때만 회전된 로그까지 읽음 (구간 밖 세그먼트는 인덱스로 건너뜀)
+        log_path = LOG_HISTORY_DIR
     else:
         log_path = DEFAULT_LOG_PATH
 
     try:
-        df_alerts = extract_alerts(log_path)
-        X = featurize(df_alerts)
-        if MODEL:
+        # 구간/히스토리 조회 결과는 학습용 CSV 를 덮어쓰지 않음
+        df_alerts = extract_alerts(log_path, start=start, end=end,
+                                   save_csv=not (start or end))
+        if df_alerts.empty:
+            summary = '총 이벤트: 0건 (선택한 구간에 알림이 없습니다)'
+            table_html = ''
+        elif MODEL:
+            X = featurize(df_alerts, sig_vocab=dict(SIG_VOCAB))
             preds = MODEL.predict(X)
             df_alerts['anomaly'] = preds
             total = len(df_alerts)
@@ -186,7 +207,7 @@ def system_info():
 def anomaly_stats():
     try:
         df = extract_alerts(DEFAULT_LOG_PATH)
-        X = featurize(df)
+        X = featurize(df, sig_vocab=dict(SIG_VOCAB))
         preds = MODEL.predict(X) if MODEL else []
         df['anomaly'] = preds
     except Exception as e: